@@ -1,10 +1,15 @@
 import pandas as pd
 pd.set_option('future.no_silent_downcasting', True)
 import numpy as np
+import threading
+from concurrent.futures import ThreadPoolExecutor, as_completed
 from .llm_utils import get_llm_judgment
 from .config import load_config
 config = load_config()
 TOP_N_COMPANIES = config.get('top_n_companies', 3)
+LLM_CONCURRENCY = config.get('llm_concurrency', 16)
+# Caps in-flight provider requests so parallel workers stay under the API rate limit
+_LLM_SEMAPHORE = threading.Semaphore(config.get('llm_rate_limit', 8))
 import warnings
 warnings.filterwarnings('ignore', category=RuntimeWarning, module='pandas.core.dtypes.cast')
 
@@ -13,99 +18,158 @@ def summarize_company_data(df_company, max_years=3):
     """Create compact summary of company's revenue trend UP TO target year."""
     df_sorted = df_company.sort_values('year')
     
-    summary_parts = []
-    for _, row in df_sorted.iterrows():
-        revenue_val = row.get('revenue')
-        revenue_str = f"{int(revenue_val):,}" if pd.notna(revenue_val) and revenue_val != "N/A" else "MISSING"
-        
-        yoy_val = row.get('yoy_change')
-        if pd.isna(yoy_val):
-            yoy_str = "MISSING"
-        else:
-            yoy_str = f"{yoy_val:+.0%}"
-        
-        fiscal_val = row.get('fiscal_period_end')
-        year_val = str(fiscal_val) if fiscal_val != "N/A" else "UNKNOWN"
-        
-        summary_parts.append(f"{year_val}: {revenue_str} ({yoy_str})")
+    revenue = pd.to_numeric(df_sorted['revenue'].replace("N/A", np.nan), errors='coerce').to_numpy(dtype=float)
+    yoy = pd.to_numeric(df_sorted['yoy_change'], errors='coerce').to_numpy(dtype=float)
+    fiscal = df_sorted['fiscal_period_end'].astype(str).to_numpy()
+    
+    # Thousands separators have no numpy equivalent; only the present values are formatted
+    revenue_str = np.full(revenue.shape, "MISSING", dtype=object)
+    has_revenue = ~np.isnan(revenue)
+    revenue_str[has_revenue] = [f"{int(v):,}" for v in revenue[has_revenue]]
+    
+    yoy_abs = np.abs(yoy)
+    yoy_pct = np.where(
+        np.isinf(yoy_abs),
+        "inf",  # growth from a zero base
+        np.rint(np.where(np.isfinite(yoy_abs), yoy_abs, 0) * 100).astype(int).astype(str),
+    )
+    yoy_str = np.where(
+        np.isnan(yoy),
+        "MISSING",
+        np.char.add(np.char.add(np.where(yoy >= 0, "+", "-"), yoy_pct), "%"),
+    )
     
+    year_str = np.where(fiscal == "N/A", "UNKNOWN", fiscal)
+    
+    summary_parts = year_str.astype(object) + ": " + revenue_str + " (" + yoy_str.astype(object) + ")"
     return "; ".join(summary_parts)
 
-def get_peer_context(full_df, company_row, target_year):
-    """Get summary statistics for peers in same country and industry FOR SPECIFIC YEAR."""
+def build_peer_index(full_df):
+    """Precompute peer provider ids and numeric revenue per (country, industry, year) group."""
+    revenue = pd.to_numeric(full_df['revenue'].replace("N/A", np.nan), errors='coerce').to_numpy(dtype=float)
+    provider_ids = full_df['provider_id'].to_numpy()
+    # Positional row indices per group; one hash pass, no per-group DataFrames
+    groups = full_df.groupby(['country', 'industry_code', 'year'], observed=True, sort=False).indices
+    return {key: (provider_ids[idxs], revenue[idxs]) for key, idxs in groups.items()}
+
+def get_peer_context(full_df, company_row, target_year, peer_index=None):
+    """
+    Get summary statistics for peers in same country and industry FOR SPECIFIC YEAR.
+    Callers looking up many rows should pass peer_index (from build_peer_index);
+    without it, the single group is filtered from full_df directly.
+    """
     country = company_row['country']
     industry = company_row['industry_code']
     company_id = company_row['provider_id']
     
-    # Filter peers for the SPECIFIC YEAR
-    peer_mask = (
-        (full_df['country'] == country) & 
-        (full_df['industry_code'] == industry) & 
-        (full_df['provider_id'] != company_id) &
-        (full_df['year'] == target_year)  
-    )
-    peers_df = full_df[peer_mask]
+    # Take the SPECIFIC YEAR group, then drop the company's own rows
+    if peer_index is not None:
+        provider_ids, revenue = peer_index.get(
+            (country, industry, target_year), (np.array([], dtype=object), np.array([]))
+        )
+    else:
+        group_mask = (
+            (full_df['country'] == country) &
+            (full_df['industry_code'] == industry) &
+            (full_df['year'] == target_year)
+        ).to_numpy(dtype=bool)
+        provider_ids = full_df['provider_id'].to_numpy()[group_mask]
+        revenue = pd.to_numeric(
+            full_df['revenue'][group_mask].replace("N/A", np.nan), errors='coerce'
+        ).to_numpy(dtype=float)
+    is_peer = provider_ids != company_id
     
-    if peers_df.empty:
+    if not is_peer.any():
         return {"peer_count": 0, "message": f"No peers found for {target_year}"}
-    peer_revenue = peers_df['revenue'].replace("N/A", np.nan)
-    peer_revenue = pd.to_numeric(peer_revenue, errors='coerce').dropna()
     
-    if peer_revenue.empty:
-        return {"peer_count": len(peers_df), "message": f"No peer revenue data for {target_year}"}
+    peer_revenue = revenue[is_peer]
+    peer_revenue = peer_revenue[~np.isnan(peer_revenue)]
+    
+    if peer_revenue.size == 0:
+        return {"peer_count": int(is_peer.sum()), "message": f"No peer revenue data for {target_year}"}
     
     return {
-        "peer_count": len(peers_df['provider_id'].unique()),
-        "median_revenue": peer_revenue.median(),
+        "peer_count": len(pd.unique(provider_ids[is_peer])),
+        "median_revenue": np.median(peer_revenue),
         "mean_revenue": peer_revenue.mean(),
-        "q25_revenue": peer_revenue.quantile(0.25),
-        "q75_revenue": peer_revenue.quantile(0.75),
+        "q25_revenue": np.quantile(peer_revenue, 0.25),
+        "q75_revenue": np.quantile(peer_revenue, 0.75),
         "analysis_year": target_year  # year context
     }
 
-def run_llm_analysis(df):
-    """Run LLM analysis on top volatile companies - YEAR BY YEAR."""
-    df = df.copy()
+def _analyze_row(company_data, full_df, company_row, peer_index=None):
+    """Run the LLM judgment for a single company-year row."""
+    company_name = company_row['company_name']
+    target_year = company_row['year']
+    
+    # Get year-specific summary
+    year_data = company_data[company_data['year'] <= target_year].tail(3)  # Last 3 years including current
+    company_summary = summarize_company_data(year_data)
     
-    # Prepare new columns
-    df['llm_verdict'] = pd.NA
-    df['llm_explanation'] = pd.NA
-    df['llm_confidence'] = pd.NA
+    # Get year-specific peer context
+    peer_context = get_peer_context(full_df, company_row, target_year, peer_index)
     
+    # Get LLM judgment for THIS SPECIFIC YEAR
+    with _LLM_SEMAPHORE:
+        llm_result = get_llm_judgment(company_name, company_summary, peer_context)
+    
+    return company_row.name, llm_result
+
+def run_llm_analysis(df):
+    """
+    Run LLM analysis on top volatile companies - YEAR BY YEAR.
+    Returns a new frame with the llm_* columns attached; the input is not copied up front.
+    """
     # Select top volatile companies
+    volatile = df['yoy_volatility_flag'] == True
     high_volatility_companies = (
-        df[df['yoy_volatility_flag'] == True]
-        .groupby('company_name')['yoy_change']
-        .apply(lambda x: x.abs().max())
+        df.loc[volatile, 'yoy_change'].abs()
+        .groupby(df.loc[volatile, 'company_name'], observed=True)
+        .max()
         .nlargest(TOP_N_COMPANIES)
         .index.tolist()
     )
     
-    results = {}
+    # Peer statistics are looked up per company-year, so group the frame once
+    peer_index = build_peer_index(df)
+    
+    # Collect every company-year job up front so the LLM calls can run concurrently
+    # (one isin pass over the frame instead of one equality scan per company)
+    targets = df[df['company_name'].isin(high_volatility_companies)]
+    company_groups = dict(iter(targets.groupby('company_name', observed=True, sort=False)))
+    
+    jobs = []
     for company_name in high_volatility_companies:
-        company_data = df[df['company_name'] == company_name]
+        company_data = company_groups[company_name]
+        for _, company_row in company_data.iterrows():
+            jobs.append((company_data, company_row))
+    
+    llm_results = [None] * len(jobs)
+    if jobs:
+        with ThreadPoolExecutor(max_workers=min(LLM_CONCURRENCY, len(jobs))) as executor:
+            futures = {
+                executor.submit(_analyze_row, company_data, df, company_row, peer_index): position
+                for position, (company_data, company_row) in enumerate(jobs)
+            }
+            for future in as_completed(futures):
+                llm_results[futures[future]] = future.result()
+    
+    # Fill preallocated column arrays by position, then attach them in a single assign
+    verdicts = np.full(len(df), pd.NA, dtype=object)
+    explanations = np.full(len(df), pd.NA, dtype=object)
+    confidences = np.full(len(df), np.nan, dtype='float64')
+    positions = df.index.get_indexer([index for index, _ in llm_results])
+    
+    results = {}
+    for (_, company_row), (_, llm_result), pos in zip(jobs, llm_results, positions):
+        verdicts[pos] = llm_result.get('verdict', 'uncertain')
+        explanations[pos] = llm_result.get('explanation', '')
+        confidences[pos] = llm_result.get('confidence', 0.5)
         
-        # Analyze EACH YEAR separately
-        for index, company_row in company_data.iterrows():
-            target_year = company_row['year']
-            
-            # Get year-specific summary
-            year_data = company_data[company_data['year'] <= target_year].tail(3)  # Last 3 years including current
-            company_summary = summarize_company_data(year_data)
-            
-            # Get year-specific peer context
-            peer_context = get_peer_context(df, company_row, target_year)
-            
-            # Get LLM judgment for THIS SPECIFIC YEAR
-            llm_result = get_llm_judgment(company_name, company_summary, peer_context)
-            
-            # Store results for this specific year
-            df.loc[index, 'llm_verdict'] = llm_result.get('verdict', 'uncertain')
-            df.loc[index, 'llm_explanation'] = llm_result.get('explanation', '')
-            df.loc[index, 'llm_confidence'] = llm_result.get('confidence', 0.5)
-            
-            # Store in results by company-year key
-            year_key = f"{company_name}_{target_year}"
-            results[year_key] = llm_result
-    
-    return df, results
\ No newline at end of file
+        # Store in results by company-year key
+        year_key = f"{company_row['company_name']}_{company_row['year']}"
+        results[year_key] = llm_result
+    
+    df = df.assign(llm_verdict=verdicts, llm_explanation=explanations, llm_confidence=confidences)
+    
+    return df, results
@@ -1,5 +1,6 @@
 from pathlib import Path
 from datetime import datetime
+from functools import lru_cache
 import yaml
 import os
 from dotenv import load_dotenv 
@@ -24,7 +25,10 @@ TIMESTAMP = datetime.now().strftime("%Y%m%d_%H%M%S")
 RAW_DATA_PATH = DATA_RAW_PATH / "CaseStudy_Quality_sample25.xlsx"
 
 # Intermediate file
-SNAPSHOT_PATH = DATA_PROCESSED_PATH / "rule_checks_snapshot_LATEST.csv"
+SNAPSHOT_PATH = DATA_PROCESSED_PATH / "rule_checks_snapshot_LATEST.parquet"
+
+# On-disk cache of LLM responses (reused across runs)
+LLM_CACHE_PATH = PROJECT_ROOT / ".llm_cache"
 
 # Final output files (unique per run with pipeline identifier and timestamp)
 FINAL_OUTPUT_PATH = DATA_PROCESSED_PATH / f"final_checked_data_PIPELINE_{TIMESTAMP}.xlsx"
@@ -32,15 +36,18 @@ FINAL_OUTPUT_PATH = DATA_PROCESSED_PATH / f"final_checked_data_PIPELINE_{TIMESTA
 # Report files (unique per run with pipeline identifier and timestamp)
 RULE_BASED_REPORT_PATH = REPORTS_PATH / f"rule_based_checks_report_PIPELINE_{TIMESTAMP}.txt"
 LLM_REPORT_PATH = REPORTS_PATH / f"llm_anomaly_report_PIPELINE_{TIMESTAMP}.txt"
+COMBINED_REPORT_PATH = REPORTS_PATH / f"combined_quality_report_PIPELINE_{TIMESTAMP}.txt"
 
 # Quality check parameters
 VOLATILITY_THRESHOLD = 0.5  # 50%
 TOP_N_COMPANIES = 3  # For LLM analysis
 
+@lru_cache(maxsize=1)
 def load_config():
     """
     Load configuration from YAML file and environment variables.
-    Returns combined configuration dictionary.
+    Returns combined configuration dictionary (parsed once, then cached;
+    call load_config.cache_clear() to force a reload).
     """
     # Load environment variables from .env file
     load_dotenv()
@@ -67,6 +74,10 @@ def load_config():
     config.setdefault('temperature', 0.1)
     config.setdefault('top_n_companies', 3) 
     config.setdefault('volatility_threshold', 0.5)
+    config.setdefault('llm_concurrency', 16)  # Worker threads for LLM calls
+    config.setdefault('llm_rate_limit', 8)  # Max concurrent provider requests
+    config.setdefault('llm_cache_enabled', True)  # Reuse responses for identical prompts
+    config.setdefault('combined_report', False)  # One report file (quality + LLM) instead of two
 
     # Validate required keys
     if not config['gemini_api_key']:
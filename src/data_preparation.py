@@ -1,16 +1,110 @@
 import pandas as pd
 import numpy as np
 import re
+import warnings
+from datetime import date, datetime
 from pathlib import Path
 from .config import VOLATILITY_THRESHOLD
 import logging
 
 logger = logging.getLogger(__name__)
 
+# Standard fiscal period format, e.g. '31-Mar'
+_DATE_RE = re.compile(r'^\d{2}-[A-Za-z]{3}$', re.IGNORECASE)
+
+# Low-cardinality keys used in groupby, masks and sorts; stored as int-coded categoricals.
+# revenue_unit is left out because the checks rewrite it (unit inference, "N/A" fill).
+CATEGORICAL_COLUMNS = ("company_name", "country", "industry_code", "operation_status", "ipo_status")
+
+def _mixed_type_columns(df):
+    """Object columns that mix value types (e.g. int and str ids)."""
+    return [
+        col for col in df.columns
+        if df[col].dtype == object and pd.api.types.infer_dtype(df[col], skipna=True).startswith("mixed")
+    ]
+
+def stringify_mixed_columns(df):
+    """Return a copy with mixed-type object columns cast to str so they fit Parquet."""
+    mixed_cols = _mixed_type_columns(df)
+    if not mixed_cols:
+        return df
+    return df.assign(**{col: df[col].where(df[col].isna(), df[col].astype(str)) for col in mixed_cols})
+
+# Mixed-type columns are cached as text plus a per-value type tag column, so the
+# original Python types can be restored exactly on read
+_TYPE_TAG_PREFIX = "__pytype__"
+_CACHE_DECODERS = {
+    "int": int,
+    "float": float,
+    "bool": lambda text: text == "True",
+    "str": str,
+    "datetime": datetime.fromisoformat,
+    "Timestamp": pd.Timestamp,
+    "date": date.fromisoformat,
+}
+
+def _encode_mixed_columns(df, mixed_cols):
+    """Return a Parquet-safe copy with mixed columns as text and their type tags, or None if a type is unsupported."""
+    encoded = {}
+    for col in mixed_cols:
+        values = df[col]
+        present = values.notna()
+        tags = values[present].map(lambda v: type(v).__name__)
+        if not tags.isin(list(_CACHE_DECODERS)).all():
+            return None
+        text = values[present].map(lambda v: v.isoformat() if isinstance(v, date) else str(v))
+        encoded[col] = text.reindex(values.index)
+        encoded[_TYPE_TAG_PREFIX + col] = tags.reindex(values.index)
+    return df.assign(**encoded)
+
+def _decode_mixed_columns(df):
+    """Restore a cached frame as read_excel returned it (mixed columns in their original types)."""
+    # Parquet hands back missing text as None; read_excel uses NaN
+    decoded = {
+        col: df[col].where(df[col].notna(), np.nan)
+        for col in df.columns if df[col].dtype == object
+    }
+    tag_cols = [col for col in df.columns if col.startswith(_TYPE_TAG_PREFIX)]
+    for tag_col in tag_cols:
+        col = tag_col[len(_TYPE_TAG_PREFIX):]
+        values = decoded[col]
+        tags = df[tag_col]
+        for tag, decode in _CACHE_DECODERS.items():
+            is_tag = (tags == tag).to_numpy()
+            if is_tag.any():
+                values[is_tag] = [decode(text) for text in values[is_tag]]
+    return df.assign(**decoded).drop(columns=tag_cols)
+
+def _read_source(filepath):
+    """Read the raw file (Excel, CSV or Parquet), reusing a Parquet copy of Excel inputs while it is up to date."""
+    filepath = Path(filepath)
+    suffix = filepath.suffix.lower()
+    if suffix == ".parquet":
+        return pd.read_parquet(filepath)
+    if suffix == ".csv":
+        return pd.read_csv(filepath)
+    
+    cache_path = filepath.with_suffix(".cache.parquet")
+    if cache_path.exists() and cache_path.stat().st_mtime >= filepath.stat().st_mtime:
+        return _decode_mixed_columns(pd.read_parquet(cache_path))
+    
+    df = pd.read_excel(filepath)
+    # Parquet cannot store mixed-type columns (e.g. int and str ids) directly;
+    # they are written type-tagged and the returned frame keeps its original values
+    cache_df = _encode_mixed_columns(df, _mixed_type_columns(df))
+    if cache_df is None:
+        logger.warning(f"Not caching {filepath} as Parquet: unsupported value types in mixed-type columns")
+        return df
+    try:
+        cache_df.to_parquet(cache_path, engine="pyarrow", compression="zstd", index=False)
+    except Exception as e:
+        logger.warning(f"Could not cache {filepath} as Parquet: {e}")
+    return df
+
 def load_raw_data(filepath):
-    """Load and standardize column names from raw Excel file."""
+    """Load and standardize column names from raw Excel (or CSV/Parquet) file."""
     try:
-        df = pd.read_excel(filepath)
+        df = _read_source(filepath)
         # Check if expected columns exist
         expected_cols = ["timevalue", "providerkey", "companynameofficial"]
         missing_cols = [col for col in expected_cols if col not in df.columns]
@@ -33,7 +127,12 @@ def load_raw_data(filepath):
         "REVENUE": "revenue",
         "unit_REVENUE": "revenue_unit"
     }
-    return df.rename(columns=column_mapping)
+    df = df.rename(columns=column_mapping)
+    
+    for col in CATEGORICAL_COLUMNS:
+        if col in df.columns:
+            df[col] = df[col].astype("category")
+    return df
 
 def correct_fiscal_period_end(date_val):
     """
@@ -44,7 +143,7 @@ def correct_fiscal_period_end(date_val):
     corrected_value = original_value  # Default to original
     
     # Check if already in correct format
-    if isinstance(date_val, str) and re.match(r'^\d{2}-[A-Za-z]{3}$', date_val, re.IGNORECASE):
+    if isinstance(date_val, str) and _DATE_RE.match(date_val):
         return corrected_value, False 
     
     # Handle string dates that need conversion
@@ -67,6 +166,55 @@ def correct_fiscal_period_end(date_val):
     
     return corrected_value, was_corrected
 
+def _date_candidates(dates):
+    """Mask of strings and date-like values, built without a per-value Python call."""
+    present = dates.notna()
+    if pd.api.types.is_datetime64_any_dtype(dates):
+        return present
+    try:
+        is_str = dates.str.len().notna()
+    except AttributeError:  # no strings in the column
+        is_str = pd.Series(False, index=dates.index)
+    # Whatever is left and does not coerce to a number is date-like (datetime, date, Timestamp)
+    is_number = pd.to_numeric(dates.where(~is_str), errors='coerce').notna()
+    return is_str | (present & ~is_number)
+
+def correct_fiscal_period_end_column(dates):
+    """
+    Vectorized counterpart of correct_fiscal_period_end for a whole Series.
+    Returns a tuple: (corrected_series, was_corrected_series)
+    """
+    already_ok = dates.astype(str).str.match(_DATE_RE, na=False)
+    # Only strings and date objects are candidates; numbers would parse as epoch offsets
+    parseable = _date_candidates(dates)
+    
+    candidates = parseable & ~already_ok
+    try:
+        # Mixed offsets give an object result today (and raise in later pandas); both fall back below
+        with warnings.catch_warnings():
+            warnings.simplefilter("ignore", FutureWarning)
+            parsed = pd.to_datetime(dates.where(candidates), errors='coerce', format='mixed')
+    except (ValueError, TypeError):
+        parsed = None
+    
+    if parsed is not None and pd.api.types.is_datetime64_any_dtype(parsed):
+        corrected = parsed.dt.strftime('%d-%b').copy()
+        # Unparsed candidates are retried below: coercion also turns a tz-aware value
+        # mixed with naive ones into NaT, not just invalid strings
+        retry = candidates & parsed.isna()
+    else:
+        # Time zone-aware values (or a mix of offsets) don't parse into one datetime64 column
+        corrected = pd.Series(np.nan, index=dates.index, dtype=object)
+        retry = candidates
+    
+    # Per-value fallback for the entries the vectorized parse could not handle
+    if retry.any():
+        results = dates[retry].map(correct_fiscal_period_end)
+        corrected[retry] = [value if fixed else np.nan for value, fixed in results]
+    was_corrected = corrected.notna()
+    
+    return dates.where(~was_corrected, corrected), was_corrected
+
 def infer_missing_revenue_unit(row):
     """Infer missing revenue_unit based on country."""
     if pd.notna(row.get('revenue_unit')) and row['revenue_unit'] != '':
@@ -75,24 +223,38 @@ def infer_missing_revenue_unit(row):
         return 'GBP'
     return row.get('revenue_unit')
 
+def _yoy_and_flag(revenue, group_ids, threshold):
+    """
+    YoY change and volatility flag for revenue already sorted by group and year.
+    group_ids are integer codes from pd.factorize (-1 marks a missing group).
+    """
+    yoy = np.full(revenue.size, np.nan)
+    # The previous year is the row above, as long as it belongs to the same group
+    same_group = (group_ids[1:] == group_ids[:-1]) & (group_ids[1:] != -1)
+    with np.errstate(divide="ignore", invalid="ignore"):
+        yoy[1:] = np.where(same_group, revenue[1:] / revenue[:-1] - 1.0, np.nan)
+    return yoy, np.abs(yoy) > threshold
+
 def run_rule_based_checks(df):
-    """Execute all rule-based data quality checks."""
-    df = df.copy()
-    
+    """
+    Execute all rule-based data quality checks.
+    Note: helper columns are added to the passed frame in place (no defensive copy);
+    the returned frame is a new, sorted one.
+    """
     # 1. Date format correction 
     df['fiscal_period_end_original'] = df['fiscal_period_end']
     
-    # Apply the correction and track changes
-    correction_results = df['fiscal_period_end'].apply(correct_fiscal_period_end)
-    df['fiscal_period_end'] = correction_results.apply(lambda x: x[0])  # The corrected value
-    df['date_was_corrected'] = correction_results.apply(lambda x: x[1])  # The flag (True/False)
+    # Apply the correction to the whole column and track changes
+    df['fiscal_period_end'], df['date_was_corrected'] = correct_fiscal_period_end_column(df['fiscal_period_end'])
     
     # Check format consistency on the CORRECTED values
-    date_pattern = r'^\d{2}-[A-Za-z]{3}$'
-    df['flag_date_format'] = ~df['fiscal_period_end'].astype(str).str.match(date_pattern, na=False)
+    df['flag_date_format'] = ~df['fiscal_period_end'].astype(str).str.match(_DATE_RE, na=False)
     
-    # 2. Infer missing revenue units
-    df['revenue_unit'] = df.apply(infer_missing_revenue_unit, axis=1)
+    # 2. Infer missing revenue units (vectorized form of infer_missing_revenue_unit)
+    no_values = pd.Series(None, index=df.index, dtype=object)
+    revenue_unit = df.get('revenue_unit', no_values)
+    missing_unit = revenue_unit.isna() | (revenue_unit == '')
+    df['revenue_unit'] = revenue_unit.mask(missing_unit & (df.get('country', no_values) == 'United Kingdom'), 'GBP')
     
     # 3. Standardize company names
     df['company_name_original'] = df['company_name']
@@ -116,11 +278,16 @@ def run_rule_based_checks(df):
     
     # 7. Calculate YoY volatility
     df = df.sort_values(by=["company_name", "year"])
-    df["yoy_change"] = df.groupby("company_name")["revenue"].pct_change(fill_method=None)
-    df["yoy_volatility_flag"] = abs(df["yoy_change"]) > VOLATILITY_THRESHOLD
+    company_ids, _ = pd.factorize(df["company_name"])
+    df["yoy_change"], df["yoy_volatility_flag"] = _yoy_and_flag(
+        df["revenue"].to_numpy(dtype="float64", na_value=np.nan), company_ids, VOLATILITY_THRESHOLD
+    )
+    # Count flagged companies here from the factorized codes, so reporting doesn't rescan names
+    volatile_company_count = int(np.unique(company_ids[df["yoy_volatility_flag"].to_numpy()]).size)
     
-    # 8. Standardize missing values for final output
-    columns_to_standardize = ['revenue', 'revenue_unit', 'fiscal_period_end']
+    # 8. Standardize missing text values for final output
+    # (revenue stays float64 with NaN; it is rendered as "N/A" only when exported)
+    columns_to_standardize = ['revenue_unit', 'fiscal_period_end']
     df[columns_to_standardize] = df[columns_to_standardize].fillna("N/A")
     
     # --- DATE CORRECTION REPORTING ---
@@ -150,6 +317,7 @@ def run_rule_based_checks(df):
         "missing_summary": missing_summary,
         "duplicates": duplicates,
         "volatility_flags": df[df["yoy_volatility_flag"]],
+        "volatile_company_count": volatile_company_count,
         "date_corrections_count": correction_count,
         "remaining_date_issues": df['flag_date_format'].sum()
     }
\ No newline at end of file
@@ -1,10 +1,14 @@
-import json
 import os
 import time
+import hashlib
+import threading
+from functools import lru_cache
+import orjson
 import requests
+from requests.adapters import HTTPAdapter
 from dotenv import load_dotenv
 from tenacity import retry, stop_after_attempt, wait_exponential, retry_if_exception_type
-from .config import load_config  
+from .config import load_config, LLM_CACHE_PATH
 
 # Load .env variables
 load_dotenv()
@@ -12,35 +16,126 @@ load_dotenv()
 # Control mode - False to try real APIs, True to force mock
 USE_MOCK = False
 
+# Shared HTTP session: keeps TLS connections alive across calls; pool sized for the LLM worker threads
+_SESSION = requests.Session()
+_SESSION.mount("https://", HTTPAdapter(pool_connections=32, pool_maxsize=32, max_retries=0))
+
+# Default models per provider (also part of the response cache key)
+GROQ_MODEL = "llama-3.1-8b-instant"
+GEMINI_MODEL = "gemini-1.5-flash"
+# Bump whenever build_analysis_prompt or the provider instructions change,
+# so verdicts cached for the old prompt are not reused
+PROMPT_VERSION = 1
+
+# Response cache: in-process dict in front of an optional on-disk diskcache store
+LLM_CACHE_MAXSIZE = 4096
+_memory_cache = {}
+_disk_cache = None  # None = not opened yet, False = diskcache unavailable
+_cache_lock = threading.Lock()
+
+
+def _cache_key(provider, model, company_name, company_summary, peer_context, year=None):
+    """Build a content-addressed key from the provider/model, prompt version and prompt inputs."""
+    rounded_context = {
+        k: round(v, 2) if isinstance(v, float) else v
+        for k, v in peer_context.items()
+    }
+    payload = orjson.dumps(
+        {
+            "m": f"{provider}:{model}", "v": PROMPT_VERSION,
+            "c": company_name, "s": company_summary, "p": rounded_context, "y": year,
+        },
+        option=orjson.OPT_SORT_KEYS | orjson.OPT_SERIALIZE_NUMPY,
+        default=str,
+    )
+    return hashlib.blake2b(payload).hexdigest()
+
+
+def _get_disk_cache():
+    """Open the on-disk cache lazily; returns None if diskcache is not installed."""
+    global _disk_cache
+    with _cache_lock:
+        if _disk_cache is None:
+            try:
+                import diskcache
+                _disk_cache = diskcache.Cache(str(LLM_CACHE_PATH))
+            except ImportError:
+                _disk_cache = False
+    # Compare explicitly: an empty diskcache.Cache has len() 0 and is falsy
+    return _disk_cache if _disk_cache is not False else None
+
+
+def _cache_get(key):
+    with _cache_lock:
+        if key in _memory_cache:
+            return _memory_cache[key]
+    disk_cache = _get_disk_cache()
+    if disk_cache is not None:
+        result = disk_cache.get(key)
+        if result is not None:
+            _cache_set(key, result, persist=False)
+        return result
+    return None
+
+
+def _cache_set(key, result, persist=True):
+    with _cache_lock:
+        if len(_memory_cache) >= LLM_CACHE_MAXSIZE:
+            _memory_cache.pop(next(iter(_memory_cache)))
+        _memory_cache[key] = result
+    disk_cache = _get_disk_cache() if persist else None
+    if disk_cache is not None:
+        disk_cache[key] = result
+
+
+def clear_llm_cache():
+    """Drop all cached LLM responses (in-process and on disk)."""
+    with _cache_lock:
+        _memory_cache.clear()
+    disk_cache = _get_disk_cache()
+    if disk_cache is not None:
+        disk_cache.clear()
+
 def get_llm_judgment(company_name, company_summary, peer_context, year=None):
     """
     Get LLM judgment for a company's financial data with multi-provider fallback.
-    Priority: Google Gemini → Groq API → Mock
+    Priority: Groq API → Google Gemini → Mock
     """
     config = load_config()
+    cache_enabled = config.get('llm_cache_enabled', True)
     prompt = build_analysis_prompt(company_name, company_summary, peer_context, year)
-
-    print(f"* Analyzing {company_name} ({year}) with multi-provider AI...") if year else print(
-        f"* Analyzing {company_name} with multi-provider AI..."
-    )
-
-    # Try Groq API First
-    response = call_groq_api(prompt)
-    if response:
-        print(f">> Groq analysis complete for {company_name} ({year})") if year else print(
-            f"✓ Groq analysis complete for {company_name}"
-        )
-        return parse_llm_response(response)
-
-    # Try Gemini Second
-    response = call_gemini_api(prompt)
-    if response:
-        print(f">> Gemini analysis complete for {company_name} ({year})") if year else print(
-            f"✓ Gemini analysis complete for {company_name}"
-        )
-        return parse_llm_response(response)
-
-    # Fallback to mock
+    announced = False
+
+    # Try Groq API first, then Gemini; each provider/model has its own cache entries
+    providers = (("Groq", GROQ_MODEL, call_groq_api), ("Gemini", GEMINI_MODEL, call_gemini_api))
+    for provider, model, call_api in providers:
+        if cache_enabled:
+            cache_key = _cache_key(provider, model, company_name, company_summary, peer_context, year)
+            cached = _cache_get(cache_key)
+            if cached is not None:
+                print(f">> Cached {provider} analysis reused for {company_name} ({year})") if year else print(
+                    f"✓ Cached {provider} analysis reused for {company_name}"
+                )
+                return dict(cached)
+
+        if not announced:
+            print(f"* Analyzing {company_name} ({year}) with multi-provider AI...") if year else print(
+                f"* Analyzing {company_name} with multi-provider AI..."
+            )
+            announced = True
+
+        response = call_api(prompt, model=model)
+        if response:
+            print(f">> {provider} analysis complete for {company_name} ({year})") if year else print(
+                f"✓ {provider} analysis complete for {company_name}"
+            )
+            result, parsed = _parse_llm_response(response)
+            # Only valid JSON replies are cached; a text-fallback result is retried next time
+            if cache_enabled and parsed:
+                _cache_set(cache_key, result)
+            return dict(result)
+
+    # Fallback to mock (never cached, so a later run can still reach a real provider)
     print(f">> Mock analysis complete for {company_name} ({year})") if year else print(
         f"✓ Mock analysis complete for {company_name}"
     )
@@ -77,7 +172,36 @@ EXAMPLE RESPONSE:
 {{"verdict": "implausible", "explanation": "Brief reason here.", "confidence": 0.9}}"""
 
 
-def call_gemini_api(prompt, model="gemini-1.5-flash", max_tokens=300):
+@lru_cache(maxsize=8)
+def _get_gemini_model(api_key, model, max_tokens):
+    """Configure Gemini once per key/model so repeated calls reuse the same client."""
+    import google.generativeai as genai
+
+    # Configure with safety settings disabled for analytical tasks
+    genai.configure(api_key=api_key)
+
+    generation_config = {
+        "temperature": 0.1,
+        "top_p": 0.95,
+        "top_k": 40,
+        "max_output_tokens": max_tokens,
+    }
+
+    safety_settings = [
+        {"category": "HARM_CATEGORY_HARASSMENT", "threshold": "BLOCK_NONE"},
+        {"category": "HARM_CATEGORY_HATE_SPEECH", "threshold": "BLOCK_NONE"},
+        {"category": "HARM_CATEGORY_SEXUALLY_EXPLICIT", "threshold": "BLOCK_NONE"},
+        {"category": "HARM_CATEGORY_DANGEROUS_CONTENT", "threshold": "BLOCK_NONE"},
+    ]
+
+    return genai.GenerativeModel(
+        model_name=model,
+        generation_config=generation_config,
+        safety_settings=safety_settings,
+    )
+
+
+def call_gemini_api(prompt, model=GEMINI_MODEL, max_tokens=300):
     """Call Google Gemini API (free tier)."""
     if USE_MOCK:
         return None  # Skip if mock mode forced
@@ -90,28 +214,7 @@ def call_gemini_api(prompt, model="gemini-1.5-flash", max_tokens=300):
             print("*>> GEMINI_API_KEY not found in environment variables")
             return None
 
-        # Configure with safety settings disabled for analytical tasks
-        genai.configure(api_key=api_key)
-
-        generation_config = {
-            "temperature": 0.1,
-            "top_p": 0.95,
-            "top_k": 40,
-            "max_output_tokens": max_tokens,
-        }
-
-        safety_settings = [
-            {"category": "HARM_CATEGORY_HARASSMENT", "threshold": "BLOCK_NONE"},
-            {"category": "HARM_CATEGORY_HATE_SPEECH", "threshold": "BLOCK_NONE"},
-            {"category": "HARM_CATEGORY_SEXUALLY_EXPLICIT", "threshold": "BLOCK_NONE"},
-            {"category": "HARM_CATEGORY_DANGEROUS_CONTENT", "threshold": "BLOCK_NONE"},
-        ]
-
-        model_instance = genai.GenerativeModel(
-            model_name=model,
-            generation_config=generation_config,
-            safety_settings=safety_settings,
-        )
+        model_instance = _get_gemini_model(api_key, model, max_tokens)
 
         json_enforced_prompt = prompt + "\n\nIMPORTANT: Respond with ONLY valid JSON, no additional text."
 
@@ -130,7 +233,7 @@ def call_gemini_api(prompt, model="gemini-1.5-flash", max_tokens=300):
         print(f"*>> Gemini API error: {str(e)[:200]}...")
         return None
 
-def call_groq_api(prompt, model="llama-3.1-8b-instant", max_tokens=300):
+def call_groq_api(prompt, model=GROQ_MODEL, max_tokens=300):
     """Call Groq API - FREE TIER available with fast performance"""
     if USE_MOCK:
         return None
@@ -160,7 +263,7 @@ def call_groq_api(prompt, model="llama-3.1-8b-instant", max_tokens=300):
             "response_format": {"type": "json_object"}
         }
 
-        response = requests.post(
+        response = _SESSION.post(
             "https://api.groq.com/openai/v1/chat/completions",
             headers=headers,
             json=payload,
@@ -197,11 +300,11 @@ def _get_mock_response(company_name, company_summary, peer_context, year):
     has_extreme_values = any("MISSING" in part or "UNKNOWN" in part for part in years)
 
     if peer_count == 0:
-        return json.dumps({
+        return orjson.dumps({
             "verdict": "uncertain",
             "explanation": f"{analysis_year_int}: Insufficient peer data for reliable comparison. No comparable companies in same industry/country.",
             "confidence": 0.4,
-        })
+        }).decode()
 
     if has_high_volatility:
         explanations = [
@@ -240,21 +343,28 @@ def _get_mock_response(company_name, company_summary, peer_context, year):
     explanation = explanations[year_modifier % len(explanations)]
     confidence = max(0.4, min(0.95, confidence + (year_modifier * 0.01)))
 
-    return json.dumps({
+    return orjson.dumps({
         "verdict": verdict,
         "explanation": explanation,
         "confidence": round(confidence, 2),
-    })
+    }).decode()
 
 
 def parse_llm_response(response_text):
     """Parse LLM response into structured dictionary with robust error handling."""
+    return _parse_llm_response(response_text)[0]
+
+def _parse_llm_response(response_text):
+    """
+    Parse an LLM response.
+    Returns a tuple: (result, parsed_json_flag); the flag is False when a fallback result was used.
+    """
     if not response_text or not isinstance(response_text, str):
         return {
             "verdict": "uncertain",
             "explanation": "No response received from AI analysis",
             "confidence": 0.5,
-        }
+        }, False
 
     try:
         cleaned_response = response_text.strip()
@@ -269,7 +379,7 @@ def parse_llm_response(response_text):
             end = cleaned_response.rfind("}") + 1
             cleaned_response = cleaned_response[start:end]
 
-        result = json.loads(cleaned_response)
+        result = orjson.loads(cleaned_response)
 
         required_fields = ["verdict", "explanation", "confidence"]
         if not all(field in result for field in required_fields):
@@ -284,14 +394,14 @@ def parse_llm_response(response_text):
         except (ValueError, TypeError):
             result["confidence"] = 0.5
 
-        return result
+        return result, True
 
-    except json.JSONDecodeError as e:
+    except orjson.JSONDecodeError as e:
         print(f"*>> JSON parse error: {e}. Response: {response_text[:200]}...")
-        return _parse_text_fallback(response_text)
+        return _parse_text_fallback(response_text), False
     except Exception as e:
         print(f"*>> Response parsing error: {e}")
-        return _parse_text_fallback(response_text)
+        return _parse_text_fallback(response_text), False
 
 
 def _parse_text_fallback(response_text):
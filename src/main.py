@@ -1,15 +1,21 @@
 import pandas as pd
+from datetime import datetime
+from concurrent.futures import ThreadPoolExecutor
 from .data_preparation import load_raw_data, run_rule_based_checks
 from .analysis import run_llm_analysis
-from .reporting import generate_quality_report, generate_llm_report, save_to_excel
-from .config import RAW_DATA_PATH, SNAPSHOT_PATH, FINAL_OUTPUT_PATH, RULE_BASED_REPORT_PATH, LLM_REPORT_PATH
-from openpyxl import load_workbook
-from openpyxl.styles import Alignment
+from .reporting import (generate_quality_report, generate_llm_report, generate_combined_report,
+                        save_to_excel, save_snapshot)
+from .config import (RAW_DATA_PATH, SNAPSHOT_PATH, FINAL_OUTPUT_PATH, RULE_BASED_REPORT_PATH, LLM_REPORT_PATH,
+                     COMBINED_REPORT_PATH, load_config)
 import os
 
 def main():
     """Run the complete data quality pipeline."""
     print("Starting data quality pipeline...")
+    # One timestamp shared by both reports of this run
+    generated_at = datetime.now().isoformat(timespec='seconds')
+    # Write both reports into one file (in a single write) instead of two
+    combined_report = load_config().get('combined_report', False)
     
     # 1. Load and prepare data
     print("Loading and preparing data...")
@@ -20,12 +26,13 @@ def main():
     df, check_results = run_rule_based_checks(df)
     
     # 3. Save the snapshot for the next stage
-    df.to_csv(SNAPSHOT_PATH, index=False)
+    save_snapshot(df, SNAPSHOT_PATH)
     print(f"Saved rule-based results to: {SNAPSHOT_PATH}")
     
-    # 4. Generate quality report
-    print("Generating quality report...")
-    generate_quality_report(check_results, RULE_BASED_REPORT_PATH)
+    # 4. Generate quality report (deferred to step 7 when combined)
+    if not combined_report:
+        print("Generating quality report...")
+        generate_quality_report(check_results, RULE_BASED_REPORT_PATH, generated_at=generated_at)
     
     # 5. Run LLM analysis
     print("Running LLM-powered analysis...")
@@ -41,24 +48,38 @@ def main():
     ]
     
     # Count missing values before replacement
-    missing_before = df[columns_to_standardize].isna().sum().sum()
+    # (revenue gaps were standardized by the rule-based checks, which render them
+    # as "N/A" at export, so they are not counted again here)
+    count_columns = [col for col in columns_to_standardize if col != 'revenue']
+    missing_before = df[count_columns].isna().sum().sum()
     print(f" - Missing values found in key columns: {missing_before}")
     
-    # Replace NaN values with "N/A" for clean presentation
-    df[columns_to_standardize] = df[columns_to_standardize].fillna("N/A")
+    # Replace NaN values with "N/A" in the text columns; numeric columns keep NaN
+    # (float64) and are rendered as "N/A" when the Excel file is written
+    text_columns = ['revenue_unit', 'fiscal_period_end', 'llm_verdict', 'llm_explanation']
+    df[text_columns] = df[text_columns].fillna("N/A")
     
-    # Count after replacement
-    missing_after = df[columns_to_standardize].isna().sum().sum()
-    values_standardized = missing_before - missing_after
+    # Every counted missing value is presented as "N/A"
+    values_standardized = missing_before
     print(f" - Missing values standardized to 'N/A': {values_standardized}")
     
-    # 6. Generate LLM report (include standardization info)
-    print("Generating LLM report...")
-    generate_llm_report(llm_results, LLM_REPORT_PATH, values_standardized)
-    
-    # 7. Save final results with professional formatting
+    # 6. Save final results with professional formatting
+    # (df is final from here on, so the workbook is written in the background
+    # while the LLM report is generated)
     print("Saving final results...")
-    output_path = save_to_excel(df, FINAL_OUTPUT_PATH)
+    with ThreadPoolExecutor(max_workers=1) as excel_pool:
+        excel_future = excel_pool.submit(save_to_excel, df, FINAL_OUTPUT_PATH)
+        
+        # 7. Generate LLM report (include standardization info)
+        if combined_report:
+            print("Generating combined quality and LLM report...")
+            generate_combined_report(check_results, llm_results, values_standardized,
+                                     COMBINED_REPORT_PATH, generated_at=generated_at)
+        else:
+            print("Generating LLM report...")
+            generate_llm_report(llm_results, LLM_REPORT_PATH, values_standardized, generated_at=generated_at)
+        
+        output_path = excel_future.result()
     
     print(f"Pipeline complete! Results saved to: {output_path}")
     return df, check_results, llm_results, values_standardized
@@ -1,75 +1,215 @@
 import pandas as pd
+import numpy as np
 from datetime import datetime
 from pathlib import Path
-from .config import REPORTS_PATH, DATA_PROCESSED_PATH, RULE_BASED_REPORT_PATH, LLM_REPORT_PATH, FINAL_OUTPUT_PATH
-from openpyxl import load_workbook
-from openpyxl.styles import Alignment
+import warnings
+from .config import (REPORTS_PATH, DATA_PROCESSED_PATH, RULE_BASED_REPORT_PATH, LLM_REPORT_PATH,
+                     COMBINED_REPORT_PATH, FINAL_OUTPUT_PATH, SNAPSHOT_PATH)
+from .data_preparation import stringify_mixed_columns
 
-def generate_quality_report(check_results, report_path=RULE_BASED_REPORT_PATH):
-    """Generate comprehensive data quality report."""
-    with open(report_path, 'w') as f:
-        f.write("Data Quality Assessment Report\n")
-        f.write(f"Generated: {datetime.now()}\n")
-        f.write("=" * 50 + "\n\n")
-        
-        # Data type issues
-        if check_results['dtype_issues']:
-            f.write("** Data Type Issues:\n")
-            for col, info in check_results['dtype_issues'].items():
-                f.write(f" - {col}: expected {info['expected']}, got {info['actual']}\n")
-        else:
-            f.write("** All data types are correct.\n")
-        f.write("\n")
-        
-        # Missing values
-        f.write("** Missing Values:\n")
-        for col, count in check_results['missing_summary'].items():
-            f.write(f" - {col}: {count} missing\n")
-        f.write("\n")
-        
-        # Duplicates
-        dup_count = len(check_results['duplicates'])
-        f.write(f"** Duplicate Records: {dup_count}\n\n")
-        
-        # Volatility
+# xlsxwriter is preferred for the final workbook; openpyxl (write-only) is the fallback
+try:
+    import xlsxwriter
+    HAS_XLSXWRITER = True
+except ImportError:
+    HAS_XLSXWRITER = False
+
+# Header underline shared by both text reports
+_BANNER = "=" * 50 + "\n\n"
+# Separator closing each LLM report entry
+_SEPARATOR = "-" * 40 + "\n\n"
+
+def _timestamp(generated_at=None):
+    """Report timestamp; callers pass one value to stamp several reports identically."""
+    return generated_at if generated_at is not None else datetime.now().isoformat(timespec='seconds')
+
+def _quality_report_parts(check_results, generated_at=None):
+    """Lines of the rule-based quality report."""
+    parts = ["Data Quality Assessment Report\n", f"Generated: {_timestamp(generated_at)}\n", _BANNER]
+    
+    # Data type issues
+    if check_results['dtype_issues']:
+        parts.append("** Data Type Issues:\n")
+        for col, info in check_results['dtype_issues'].items():
+            parts.append(f" - {col}: expected {info['expected']}, got {info['actual']}\n")
+    else:
+        parts.append("** All data types are correct.\n")
+    parts.append("\n")
+    
+    # Missing values
+    parts.append("** Missing Values:\n")
+    for col, count in check_results['missing_summary'].items():
+        parts.append(f" - {col}: {count} missing\n")
+    parts.append("\n")
+    
+    # Duplicates
+    dup_count = len(check_results['duplicates'])
+    parts.append(f"** Duplicate Records: {dup_count}\n\n")
+    
+    # Volatility
+    # (pre-computed by run_rule_based_checks; counted here only for older result dicts)
+    vol_count = check_results.get('volatile_company_count')
+    if vol_count is None:
         vol_count = check_results['volatility_flags']['company_name'].nunique()
-        f.write(f"** Companies with High Volatility: {vol_count}\n\n")
-        
-        # --- Date Correction Summary ---
-        f.write("** Date Format Analysis:\n")
-        f.write(f" - Records corrected: {check_results.get('date_corrections_count', 0)}\n")
-        f.write(f" - Records with remaining format issues: {check_results.get('remaining_date_issues', 0)}\n")
-        f.write("\n")
-
-def generate_llm_report(llm_results, report_path=LLM_REPORT_PATH, values_standardized=0):
+    parts.append(f"** Companies with High Volatility: {vol_count}\n\n")
+    
+    # --- Date Correction Summary ---
+    parts.append("** Date Format Analysis:\n")
+    parts.append(f" - Records corrected: {check_results.get('date_corrections_count', 0)}\n")
+    parts.append(f" - Records with remaining format issues: {check_results.get('remaining_date_issues', 0)}\n")
+    parts.append("\n")
+    return parts
+
+def _llm_report_parts(llm_results, values_standardized=0, generated_at=None):
+    """Lines of the LLM anomaly report."""
+    parts = ["LLM Anomaly Detection Report\n", f"Generated: {_timestamp(generated_at)}\n", _BANNER]
+    
+    # Adding standardization info
+    parts.append("** Missing Value Standardization:\n")
+    parts.append(f" - Missing values standardized to 'N/A': {values_standardized}\n")
+    parts.append("\n")
+    
+    parts.append("** LLM Analysis Results:\n")
+    # Normalize each result once, then format every entry in a single join
+    records = [
+        (company, result.get('verdict', 'N/A'), result.get('confidence', 'N/A'), result.get('explanation', 'N/A'))
+        for company, result in llm_results.items()
+    ]
+    parts.append(''.join(
+        f"Company: {company}\nVerdict: {verdict}\nConfidence: {confidence}\nExplanation: {explanation}\n{_SEPARATOR}"
+        for company, verdict, confidence, explanation in records
+    ))
+    return parts
+
+def generate_quality_report(check_results, report_path=RULE_BASED_REPORT_PATH, generated_at=None):
+    """Generate comprehensive data quality report."""
+    # Lines are collected and written in one call
+    Path(report_path).write_text(''.join(_quality_report_parts(check_results, generated_at)), encoding='utf-8')
+
+def generate_llm_report(llm_results, report_path=LLM_REPORT_PATH, values_standardized=0, generated_at=None):
     """Generate LLM analysis report."""
-    with open(report_path, 'w') as f:
-        f.write("LLM Anomaly Detection Report\n")
-        f.write(f"Generated: {datetime.now()}\n")
-        f.write("=" * 50 + "\n\n")
-        
-        # Adding standardization info
-        f.write("** Missing Value Standardization:\n")
-        f.write(f" - Missing values standardized to 'N/A': {values_standardized}\n")
-        f.write("\n")
-        
-        f.write("** LLM Analysis Results:\n")
-        for company, result in llm_results.items():
-            f.write(f"Company: {company}\n")
-            f.write(f"Verdict: {result.get('verdict', 'N/A')}\n")
-            f.write(f"Confidence: {result.get('confidence', 'N/A')}\n")
-            f.write(f"Explanation: {result.get('explanation', 'N/A')}\n")
-            f.write("-" * 40 + "\n\n")
+    # Lines are collected and written in one call
+    Path(report_path).write_text(''.join(_llm_report_parts(llm_results, values_standardized, generated_at)), encoding='utf-8')
+
+def generate_combined_report(check_results, llm_results, values_standardized=0,
+                             report_path=COMBINED_REPORT_PATH, generated_at=None):
+    """Generate the quality and LLM reports as two sections of a single file."""
+    # One timestamp for both sections, one write for the whole file
+    generated_at = _timestamp(generated_at)
+    parts = _quality_report_parts(check_results, generated_at)
+    parts.extend(_llm_report_parts(llm_results, values_standardized, generated_at))
+    Path(report_path).write_text(''.join(parts), encoding='utf-8')
+
+def save_snapshot(df, snapshot_path=SNAPSHOT_PATH):
+    """Save an intermediate, unstyled snapshot as Parquet (Excel is reserved for the final output)."""
+    stringify_mixed_columns(df).to_parquet(snapshot_path, engine='pyarrow', compression='zstd')
+    return snapshot_path
+
+def _missing_company_mask(company_names):
+    """Rows whose company name is missing, empty or the "N/A" placeholder."""
+    return company_names.isna() | company_names.isin(["", "N/A"])
+
+# Numeric columns keep NaN through the pipeline and are shown as "N/A" in the workbook;
+# missing values in every other column are left as blank cells
+_NA_REP_COLUMNS = ("revenue", "yoy_change", "llm_confidence")
+
+def _excel_value(value, na_value="N/A"):
+    """Mirror pandas' na_rep/inf_rep for cells written without pandas."""
+    if pd.isna(value):
+        return na_value
+    if isinstance(value, float) and np.isinf(value):
+        return "inf" if value > 0 else "-inf"
+    return value
+
+def _excel_rows(sorted_df):
+    """Yield cell values row by row from one consolidated object matrix."""
+    na_values = ["N/A" if col in _NA_REP_COLUMNS else None for col in sorted_df.columns]
+    # A single to_numpy pass coalesces every block into one contiguous array,
+    # so rows are read from it instead of zipping per-column iterators
+    for row in sorted_df.to_numpy(dtype=object).tolist():
+        yield [_excel_value(value, na_value) for value, na_value in zip(row, na_values)]
+
+def _write_excel_xlsxwriter(sorted_df, filepath, missing_rows, explanation_col=None):
+    """Stream the sorted frame row by row with xlsxwriter's constant_memory mode, formatting at write time."""
+    workbook = xlsxwriter.Workbook(str(filepath), {
+        'constant_memory': True,
+        'default_date_format': 'yyyy-mm-dd hh:mm:ss',
+    })
+    ws = workbook.add_worksheet('Sheet1')
+    
+    # Pre-create every format; constant_memory rows cannot be revisited once written
+    header_fmt = workbook.add_format({'bold': True, 'border': 1, 'align': 'center', 'valign': 'top'})
+    wrap_fmt = workbook.add_format({'text_wrap': True, 'valign': 'top'})
+    red_fill = workbook.add_format({'bg_color': '#FFCCCC'})
+    red_wrap_fmt = workbook.add_format({'bg_color': '#FFCCCC', 'text_wrap': True, 'valign': 'top'})
+    
+    # Wrap text for LLM explanation column
+    if explanation_col is not None:
+        ws.set_column(explanation_col, explanation_col, 60, wrap_fmt)
+    
+    # Freeze header row for easy scrolling
+    ws.freeze_panes(1, 0)
+    
+    ws.write_row(0, 0, list(sorted_df.columns), header_fmt)
+    missing_rows = set(missing_rows)
+    # Worksheet rows are offset by one for the header
+    for pos, values in enumerate(_excel_rows(sorted_df)):
+        ws_row = pos + 1
+        if pos in missing_rows:
+            ws.set_row(ws_row, None, red_fill)
+            ws.write_row(ws_row, 0, values, red_fill)
+            if explanation_col is not None:
+                ws.write(ws_row, explanation_col, values[explanation_col], red_wrap_fmt)
+        else:
+            ws.write_row(ws_row, 0, values)
+    
+    workbook.close()
+
+def _write_excel_openpyxl(sorted_df, filepath, missing_rows, explanation_col=None):
+    """Fallback writer: stream rows through openpyxl's write-only mode, styling cells inline."""
+    from openpyxl import Workbook
+    from openpyxl.cell import WriteOnlyCell
+    from openpyxl.styles import Alignment, PatternFill
+    
+    try:
+        import lxml  # noqa: F401
+    except ImportError:
+        warnings.warn("lxml is not installed; openpyxl write-only mode will be slower and use more memory.", UserWarning)
+    
+    wb = Workbook(write_only=True)
+    ws = wb.create_sheet("Sheet1")
+    # Freeze header row for easy scrolling
+    ws.freeze_panes = "A2"
+    
+    # Build the shared styles once; openpyxl interns them, so every styled cell reuses the same objects
+    red_fill = PatternFill(start_color="FFFFCCCC", end_color="FFFFCCCC", fill_type="solid")
+    wrap_align = Alignment(wrap_text=True, vertical='top')
+    missing_rows = set(missing_rows)
+    
+    ws.append(list(sorted_df.columns))
+    for pos, values in enumerate(_excel_rows(sorted_df)):
+        if pos in missing_rows:
+            values = [WriteOnlyCell(ws, value=value) for value in values]
+            for cell in values:
+                cell.fill = red_fill
+        elif explanation_col is not None:
+            values[explanation_col] = WriteOnlyCell(ws, value=values[explanation_col])
+        if explanation_col is not None:
+            values[explanation_col].alignment = wrap_align
+        ws.append(values)
+    
+    wb.save(filepath)
 
 def save_to_excel(df, filepath=FINAL_OUTPUT_PATH):
     """Save final results to Excel with professional formatting and sorting."""
     # --- Identify LLM-processed vs non-LLM-processed records ---
     # Check if any of the LLM columns have meaningful data (not "N/A")
-    llm_processed_mask = (
-        (df['llm_verdict'] != "N/A") | 
-        (df['llm_explanation'] != "N/A") | 
-        (df['llm_confidence'] != "N/A")
-    )
+    # (one object matrix, one reduction across the three columns)
+    llm_values = df[['llm_verdict', 'llm_explanation', 'llm_confidence']].to_numpy(dtype=object)
+    llm_present = pd.notna(llm_values) & (llm_values != "N/A")
+    llm_processed_mask = pd.Series(llm_present.any(axis=1), index=df.index)
+    # Explanations only need wrapping when at least one is real
+    has_real_explanations = bool(llm_present[:, 1].any())
     
     llm_processed_count = llm_processed_mask.sum()
     non_llm_count = len(df) - llm_processed_count
@@ -79,67 +219,47 @@ def save_to_excel(df, filepath=FINAL_OUTPUT_PATH):
         print("   These records will be placed after LLM-analyzed records.")
     
     # --- Identify records with missing company names ---
-    missing_company_mask = df['company_name'].isna() | (df['company_name'] == "N/A") | (df['company_name'] == "")
+    missing_company_mask = _missing_company_mask(df['company_name'])
     missing_company_count = missing_company_mask.sum()
     
     if missing_company_count > 0:
         print(f"**<>  WARNING: Found {missing_company_count} records with missing company names!")
     
     # --- Create sorted copy ---
-    # Separate LLM-processed and non-LLM-processed records
-    llm_df = df[llm_processed_mask].copy()
-    non_llm_df = df[~llm_processed_mask].copy()
-    
-    # Sort LLM-processed records: first by company name A-Z, then by year (newest first)
-    if not llm_df.empty:
-        llm_df = llm_df.sort_values(
-            by=['company_name', 'year'], 
-            ascending=[True, False]
-        )
-    
-    # Sort non-LLM records 
-    if not non_llm_df.empty:
-        non_llm_df = non_llm_df.sort_values(
-            by=['company_name', 'year'], 
-            ascending=[True, False]
-        )
-    
-    # Combine them: LLM-processed first, then non-LLM
-    sorted_df = pd.concat([llm_df, non_llm_df], ignore_index=True)
-    
-    # --- Save with formatting ---
-    sorted_df.to_excel(filepath, index=False)
-    
-    # Apply professional formatting
-    wb = load_workbook(filepath)
-    ws = wb.active
-
-    # Wrap text for LLM explanation column
-    if "llm_explanation" in df.columns:
-        col_idx = df.columns.get_loc("llm_explanation") + 1
-        for row in ws.iter_rows(min_row=2, max_row=ws.max_row, min_col=col_idx, max_col=col_idx):
-            for cell in row:
-                cell.alignment = Alignment(wrap_text=True, vertical='top')
-    
-    # Freeze header row for easy scrolling
-    ws.freeze_panes = "A2"
+    # LLM-processed records first, then non-LLM; within each: company name A-Z, then year (newest first)
+    # One stable lexsort over integer keys, then a single take: no temporary columns or copies.
+    # Company names are ordered by categorical codes (astype builds categories in lexical order);
+    # missing names and years sort last, as with sort_values
+    company_key = df['company_name']
+    if not isinstance(company_key.dtype, pd.CategoricalDtype):
+        company_key = company_key.astype('category')
+    company_codes = company_key.cat.codes.to_numpy()
+    company_codes = np.where(company_codes < 0, len(company_key.cat.categories), company_codes)
+    years = pd.to_numeric(df['year'], errors='coerce').to_numpy(dtype='float64')
+    year_key = np.where(np.isnan(years), np.inf, -years)
+    priority = (~llm_processed_mask).to_numpy(dtype='int8')
+    order = np.lexsort((year_key, company_codes, priority))
+    sorted_df = df.take(order).reset_index(drop=True)
     
+    # --- Save with formatting (single pass, no re-open of the workbook) ---
     # Highlight ONLY rows with missing company names (not all non-LLM rows)
+    # (skipped entirely when no company names are missing)
     if missing_company_count > 0:
-        from openpyxl.styles import PatternFill
-        red_fill = PatternFill(start_color="FFFFCCCC", end_color="FFFFCCCC", fill_type="solid")
-        
-        company_name_col = sorted_df.columns.get_loc('company_name') + 1
-        for row_idx, row in enumerate(ws.iter_rows(min_row=2, max_row=ws.max_row), start=2):
-            company_cell = ws.cell(row=row_idx, column=company_name_col)
-            if company_cell.value in [None, "", "N/A"]:
-                for cell in row:
-                    cell.fill = red_fill
+        missing_rows = np.flatnonzero(_missing_company_mask(sorted_df['company_name']).to_numpy()).tolist()
+    else:
+        missing_rows = []
     
-    wb.save(filepath)
+    # Column positions are resolved once (0-based) and shared with the writers
+    col_positions = {col: i for i, col in enumerate(sorted_df.columns)}
+    explanation_col = col_positions.get("llm_explanation") if has_real_explanations else None
+    
+    if HAS_XLSXWRITER:
+        _write_excel_xlsxwriter(sorted_df, filepath, missing_rows, explanation_col)
+    else:
+        _write_excel_openpyxl(sorted_df, filepath, missing_rows, explanation_col)
     
     # --- Print summary ---
-    llm_companies = llm_df['company_name'].nunique() if not llm_df.empty else 0
+    llm_companies = df.loc[llm_processed_mask, 'company_name'].nunique()
     print(f"✓ Output sorted: {llm_companies} companies with LLM analysis, {non_llm_count} records without LLM analysis")
     print(f"✓ LLM-analyzed companies sorted alphabetically, then by year (newest first)")
     print(f"✓ Only records with missing company names are highlighted in red")
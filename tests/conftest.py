@@ -24,6 +24,13 @@ def sample_raw_data():
         'unit_REVENUE': ['GBP', 'INR', None]
     })
 
+@pytest.fixture
+def sample_raw_file(sample_raw_data, tmp_path):
+    """Fixture writing the sample raw data to Parquet (much faster than an Excel round-trip)."""
+    raw_file = tmp_path / "test_data.parquet"
+    sample_raw_data.to_parquet(raw_file, index=False)
+    return raw_file
+
 @pytest.fixture
 def sample_processed_data():
     """Fixture providing sample processed data for testing."""
@@ -49,4 +56,15 @@ def mock_llm_response():
         "verdict": "plausible",
         "explanation": "Test explanation",
         "confidence": 0.85
-    }
\ No newline at end of file
+    }
+
+@pytest.fixture(autouse=True)
+def isolated_llm_cache(monkeypatch):
+    """Keep the LLM response cache in-memory and empty for every test."""
+    from src import llm_utils
+    monkeypatch.setattr(llm_utils, '_disk_cache', False)
+    llm_utils.clear_llm_cache()
+    llm_utils._get_gemini_model.cache_clear()
+    yield
+    llm_utils.clear_llm_cache()
+    llm_utils._get_gemini_model.cache_clear()
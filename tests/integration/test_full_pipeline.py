@@ -26,11 +26,11 @@ class TestIntegration:
         })
 
         # Save test data to temp file
-        test_file = tmp_path / "integration_test_data.xlsx"
-        test_data.to_excel(test_file, index=False)
+        test_file = tmp_path / "integration_test_data.parquet"
+        test_data.to_parquet(test_file, index=False)
 
         # Expected output files
-        expected_snapshot = tmp_path / "snapshot.csv"
+        expected_snapshot = tmp_path / "snapshot.parquet"
         expected_final_output = tmp_path / "final_output.xlsx"
         expected_quality_report = tmp_path / "quality_report.txt"
         expected_llm_report = tmp_path / "llm_report.txt"
@@ -65,6 +65,57 @@ class TestIntegration:
             assert expected_quality_report.exists()
             assert expected_llm_report.exists()
 
+            # Both reports carry the same run timestamp
+            quality_stamp = expected_quality_report.read_text().splitlines()[1]
+            llm_stamp = expected_llm_report.read_text().splitlines()[1]
+            assert quality_stamp.startswith("Generated: ")
+            assert quality_stamp == llm_stamp
+
             # Verify pipeline transformations
             assert 'yoy_change' in result_df.columns
             assert 'llm_verdict' in result_df.columns
+
+    @pytest.mark.integration
+    def test_full_pipeline_combined_report(self, tmp_path):
+        """Integration test writing the quality and LLM reports as one combined file."""
+        from src.config import load_config
+
+        test_data = pd.DataFrame({
+            'timevalue': [2023, 2022],
+            'providerkey': ['TEST1', 'TEST1'],
+            'companynameofficial': ['Integration Test Inc', 'Integration Test Inc'],
+            'fiscalperiodend': ['31-Mar', '2022-03-31'],
+            'operationstatustype': ['ACTIVE', 'ACTIVE'],
+            'ipostatustype': ['PUBLIC', 'PUBLIC'],
+            'geonameen': ['United Kingdom', 'United Kingdom'],
+            'industrycode': ['7010', '7010'],
+            'REVENUE': [3000000, 1000000],
+            'unit_REVENUE': ['GBP', 'GBP']
+        })
+        test_file = tmp_path / "integration_test_data.parquet"
+        test_data.to_parquet(test_file, index=False)
+
+        expected_combined_report = tmp_path / "combined_report.txt"
+        expected_quality_report = tmp_path / "quality_report.txt"
+        expected_llm_report = tmp_path / "llm_report.txt"
+
+        with patch.dict(load_config(), {'combined_report': True}), \
+             patch('src.main.RAW_DATA_PATH', test_file), \
+             patch('src.main.SNAPSHOT_PATH', tmp_path / "snapshot.parquet"), \
+             patch('src.main.FINAL_OUTPUT_PATH', tmp_path / "final_output.xlsx"), \
+             patch('src.main.RULE_BASED_REPORT_PATH', expected_quality_report), \
+             patch('src.main.LLM_REPORT_PATH', expected_llm_report), \
+             patch('src.main.COMBINED_REPORT_PATH', expected_combined_report):
+
+            main()
+
+            # One report file with both sections; the separate reports are not written
+            assert expected_combined_report.exists()
+            assert not expected_quality_report.exists()
+            assert not expected_llm_report.exists()
+
+            content = expected_combined_report.read_text()
+            assert "Data Quality Assessment Report" in content
+            assert "Companies with High Volatility: 1" in content
+            assert "LLM Anomaly Detection Report" in content
+            assert "COMPANY: INTEGRATION TEST INC_2023" in content.upper()
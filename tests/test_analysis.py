@@ -1,7 +1,8 @@
 import pytest
 import pandas as pd
 import numpy as np
-from src.analysis import summarize_company_data, get_peer_context, run_llm_analysis
+from unittest.mock import patch
+from src.analysis import summarize_company_data, get_peer_context, build_peer_index, run_llm_analysis
 
 class TestAnalysis:
     
@@ -13,6 +14,32 @@ class TestAnalysis:
         assert '1,000,000' in summary  # Revenue with formatting
         assert '+10%' in summary or 'MISSING' in summary  # YoY change
 
+    def test_summarize_company_data_zero_base_growth(self):
+        """Test that YoY changes from a zero revenue base render as signed infinity."""
+        company_data = pd.DataFrame({
+            'year': [2021, 2022, 2023],
+            'revenue': [0.0, 500.0, -300.0],
+            'yoy_change': [np.nan, np.inf, -np.inf],
+            'fiscal_period_end': ['31-Dec', '31-Dec', '31-Dec']
+        })
+        
+        summary = summarize_company_data(company_data)
+        
+        assert summary == "31-Dec: 0 (MISSING); 31-Dec: 500 (+inf%); 31-Dec: -300 (-inf%)"
+
+    def test_summarize_company_data_missing_revenue(self):
+        """Test that missing revenue and YoY values are reported as MISSING."""
+        company_data = pd.DataFrame({
+            'year': [2022, 2023],
+            'revenue': [1000.0, np.nan],
+            'yoy_change': [np.nan, np.nan],
+            'fiscal_period_end': ['31-Mar', 'N/A']
+        })
+        
+        summary = summarize_company_data(company_data)
+        
+        assert summary == "31-Mar: 1,000 (MISSING); UNKNOWN: MISSING (MISSING)"
+
     def test_get_peer_context_with_peers(self):
         """Test peer context with available peers."""
         # Create mock dataset with multiple companies in same country/industry
@@ -29,6 +56,30 @@ class TestAnalysis:
         assert context['peer_count'] > 0
         assert 'median_revenue' in context
 
+    def test_get_peer_context_with_peer_index(self):
+        """Test that a prebuilt peer index excludes the company itself and other years."""
+        data = pd.DataFrame([
+            {"company_name": "A", "provider_id": "1", "country": "US", "industry_code": "TECH", "revenue": 1000, "year": 2023},
+            {"company_name": "B", "provider_id": "2", "country": "US", "industry_code": "TECH", "revenue": 1200, "year": 2023},
+            {"company_name": "C", "provider_id": "3", "country": "US", "industry_code": "TECH", "revenue": "N/A", "year": 2023},
+            {"company_name": "D", "provider_id": "4", "country": "US", "industry_code": "TECH", "revenue": 9000, "year": 2022},
+            {"company_name": "E", "provider_id": "5", "country": "US", "industry_code": "TECH", "revenue": 1400, "year": 2023},
+            {"company_name": "F", "provider_id": "6", "country": "UK", "industry_code": "TECH", "revenue": 5000, "year": 2023},
+        ])
+        peer_index = build_peer_index(data)
+        expected = {
+            "peer_count": 3,  # B, C and E; C has no revenue
+            "median_revenue": 1300.0,
+            "mean_revenue": 1300.0,
+            "q25_revenue": 1250.0,
+            "q75_revenue": 1350.0,
+            "analysis_year": 2023
+        }
+        
+        # Same statistics with the prebuilt index and with the direct filter
+        assert get_peer_context(data, data.iloc[0], 2023, peer_index) == expected
+        assert get_peer_context(data, data.iloc[0], 2023) == expected
+
     def test_get_peer_context_no_peers(self):
         """Test peer context with no peers available."""
         # Create dataset with only one unique company
@@ -65,3 +116,17 @@ class TestAnalysis:
         non_volatile_mask = ~result_df['yoy_volatility_flag']
         non_volatile_llm = result_df.loc[non_volatile_mask, 'llm_verdict']
         assert all(non_volatile_llm.isin(['N/A', pd.NA]))
+
+    @patch('src.analysis.get_llm_judgment')
+    def test_run_llm_analysis_parallel_results(self, mock_judgment, sample_processed_data):
+        """Test that concurrent LLM calls write every company-year result back."""
+        mock_judgment.return_value = {"verdict": "implausible", "explanation": "Spike", "confidence": 0.9}
+        volatile_df = sample_processed_data.copy()
+        volatile_df['yoy_volatility_flag'] = [True, True, False]
+        
+        result_df, llm_results = run_llm_analysis(volatile_df)
+        
+        assert mock_judgment.call_count == 2
+        assert set(llm_results) == {'TEST COMPANY 1_2023', 'TEST COMPANY 2_2022'}
+        assert list(result_df.loc[[0, 1], 'llm_verdict']) == ['implausible', 'implausible']
+        assert list(result_df.loc[[0, 1], 'llm_confidence']) == [0.9, 0.9]
@@ -1,7 +1,9 @@
 import pytest
 import pandas as pd
 import numpy as np
-from src.data_preparation import load_raw_data, correct_fiscal_period_end, infer_missing_revenue_unit, run_rule_based_checks
+from datetime import datetime
+from src.data_preparation import (load_raw_data, correct_fiscal_period_end, correct_fiscal_period_end_column,
+                                  infer_missing_revenue_unit, run_rule_based_checks)
 
 class TestDataPreparation:
     
@@ -20,6 +22,39 @@ class TestDataPreparation:
                           'revenue', 'revenue_unit']
         assert all(col in df.columns for col in expected_columns)
         assert 'timevalue' not in df.columns  
+        assert isinstance(df['country'].dtype, pd.CategoricalDtype)
+        
+        # The Excel read is cached as Parquet and reused on the next load
+        assert test_file.with_suffix('.cache.parquet').exists()
+        cached = load_raw_data(test_file)
+        assert list(cached.columns) == list(df.columns)
+        assert cached['company_name'].tolist() == df['company_name'].tolist()
+
+    def test_load_raw_data_keeps_mixed_type_ids(self, sample_raw_data, tmp_path):
+        """Test that mixed-type columns keep their value types, fresh and from the Parquet cache."""
+        test_file = tmp_path / "test_data.xlsx"
+        sample_raw_data['providerkey'] = [101, 'TEST2', 303]
+        sample_raw_data['fiscalperiodend'] = ['31-Mar', datetime(2022, 12, 31), '30-Jun']
+        sample_raw_data.to_excel(test_file, index=False)
+        
+        fresh = load_raw_data(test_file)
+        assert test_file.with_suffix('.cache.parquet').exists()
+        cached = load_raw_data(test_file)
+        
+        for df in (fresh, cached):
+            assert df['provider_id'].tolist() == [101, 'TEST2', 303]
+            assert [type(v) for v in df['provider_id']] == [int, str, int]
+            assert df['fiscal_period_end'].tolist() == ['31-Mar', datetime(2022, 12, 31), '30-Jun']
+        assert list(cached.columns) == list(fresh.columns)
+
+    def test_load_raw_data_csv(self, sample_raw_data, tmp_path):
+        """Test that CSV inputs are loaded with the same column mapping."""
+        test_file = tmp_path / "test_data.csv"
+        sample_raw_data.to_csv(test_file, index=False)
+        
+        df = load_raw_data(test_file)
+        assert list(df['company_name']) == list(sample_raw_data['companynameofficial'])
+        assert 'providerkey' not in df.columns
 
     def test_correct_fiscal_period_end(self):
         """Test date format correction function."""
@@ -38,6 +73,34 @@ class TestDataPreparation:
         assert result == 'InvalidDate'
         assert not corrected
 
+    def test_correct_fiscal_period_end_column(self):
+        """Test vectorized date correction matches the per-value function."""
+        dates = pd.Series(['31-Mar', '2023-03-31', 'InvalidDate', None, pd.Timestamp('2022-06-30')], dtype=object)
+        
+        corrected, was_corrected = correct_fiscal_period_end_column(dates)
+        
+        assert list(corrected) == ['31-Mar', '31-Mar', 'InvalidDate', None, '30-Jun']
+        assert list(was_corrected) == [False, True, False, False, True]
+        
+        # Time zone-aware strings and Timestamps are corrected like the per-value function does
+        dates = pd.Series(['2023-03-31T00:00:00+05:00', '2022-12-31', pd.Timestamp('2022-06-30', tz='UTC'),
+                           '31-Dec'], dtype=object)
+        
+        corrected, was_corrected = correct_fiscal_period_end_column(dates)
+        
+        assert list(corrected) == [correct_fiscal_period_end(v)[0] for v in dates]
+        assert list(corrected) == ['31-Mar', '31-Dec', '30-Jun', '31-Dec']
+        assert list(was_corrected) == [True, True, True, False]
+        
+        # Numbers are not dates; a tz-aware Timestamp among naive datetimes is still corrected
+        dates = pd.Series([2023, 2.5, True, datetime(2022, 1, 1), pd.Timestamp('2022-06-30', tz='UTC'), '2023'],
+                          dtype=object)
+        
+        corrected, was_corrected = correct_fiscal_period_end_column(dates)
+        
+        assert list(corrected) == [correct_fiscal_period_end(v)[0] for v in dates]
+        assert list(was_corrected) == [False, False, False, True, True, True]
+
     def test_infer_missing_revenue_unit(self):
         """Test revenue unit inference logic."""
         # Test with existing unit
@@ -55,17 +118,15 @@ class TestDataPreparation:
         result = infer_missing_revenue_unit(row)
         assert result is None
 
-    def test_run_rule_based_checks(self, sample_raw_data, tmp_path):
+    def test_run_rule_based_checks(self, sample_raw_file):
         """Test complete rule-based checks pipeline."""
-        test_file = tmp_path / "test_data.xlsx"
-        sample_raw_data.to_excel(test_file, index=False)
-        
-        df = load_raw_data(test_file)
+        df = load_raw_data(sample_raw_file)
         df, results = run_rule_based_checks(df)
         
         # Check results structure
         expected_keys = ['dtype_issues', 'missing_summary', 'duplicates', 
-                        'volatility_flags', 'date_corrections_count', 'remaining_date_issues']
+                        'volatility_flags', 'volatile_company_count', 'date_corrections_count',
+                        'remaining_date_issues']
         assert all(key in results for key in expected_keys)
         
         # Check data transformations
@@ -91,4 +152,5 @@ class TestDataPreparation:
         # Company B should be flagged for volatility (>50% threshold)
         volatility_flags = df[df['yoy_volatility_flag']]
         assert len(volatility_flags) > 0
-        assert all(volatility_flags['company_name'] == 'B')
\ No newline at end of file
+        assert all(volatility_flags['company_name'] == 'B')
+        assert results['volatile_company_count'] == 1
\ No newline at end of file
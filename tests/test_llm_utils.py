@@ -1,6 +1,7 @@
 import pytest
 import json
 from unittest.mock import patch, MagicMock
+from src import llm_utils
 from src.llm_utils import get_llm_judgment, build_analysis_prompt, parse_llm_response, call_groq_api, call_gemini_api
 
 class TestLLMUtils:
@@ -72,7 +73,75 @@ class TestLLMUtils:
         mock_gemini.assert_called_once()
         mock_groq.assert_called_once()
 
-    @patch('src.llm_utils.requests.post')
+    @patch('src.llm_utils.call_gemini_api')
+    @patch('src.llm_utils.call_groq_api')
+    def test_get_llm_judgment_uses_cache(self, mock_groq, mock_gemini):
+        """Identical inputs are served from the cache after the first provider call."""
+        mock_groq.return_value = '{"verdict": "plausible", "explanation": "Cached", "confidence": 0.8}'
+        peer_context = {"peer_count": 2, "median_revenue": 1000.004}
+
+        first = get_llm_judgment("Test Corp", "Summary", peer_context)
+        second = get_llm_judgment("Test Corp", "Summary", {"peer_count": 2, "median_revenue": 1000.001})
+
+        assert first == second
+        mock_groq.assert_called_once()
+        mock_gemini.assert_not_called()
+
+    @patch('src.llm_utils.call_gemini_api', return_value=None)
+    @patch('src.llm_utils.call_groq_api')
+    def test_get_llm_judgment_persists_to_disk_cache(self, mock_groq, mock_gemini, tmp_path, monkeypatch):
+        """Parsed replies are written to diskcache and read back once the in-memory layer is gone."""
+        diskcache = pytest.importorskip("diskcache")
+        mock_groq.return_value = '{"verdict": "implausible", "explanation": "Spike", "confidence": 0.9}'
+        monkeypatch.setattr(llm_utils, '_disk_cache', diskcache.Cache(str(tmp_path / "llm_cache")))
+
+        first = get_llm_judgment("Test Corp", "Summary", {}, 2023)
+        assert len(llm_utils._disk_cache) == 1
+
+        # A new run: empty in-memory layer, cache reopened from the same directory
+        llm_utils._memory_cache.clear()
+        monkeypatch.setattr(llm_utils, '_disk_cache', diskcache.Cache(str(tmp_path / "llm_cache")))
+        second = get_llm_judgment("Test Corp", "Summary", {}, 2023)
+
+        assert second == first
+        mock_groq.assert_called_once()
+
+    @patch('src.llm_utils.call_gemini_api')
+    @patch('src.llm_utils.call_groq_api')
+    def test_get_llm_judgment_cache_keyed_by_provider_and_prompt(self, mock_groq, mock_gemini, monkeypatch):
+        """Cached verdicts are not reused across providers or prompt versions."""
+        mock_groq.return_value = None
+        mock_gemini.return_value = '{"verdict": "plausible", "explanation": "Gemini", "confidence": 0.8}'
+        get_llm_judgment("Test Corp", "Summary", {})
+
+        # Groq becomes available: the Gemini entry must not answer for it
+        mock_groq.return_value = '{"verdict": "implausible", "explanation": "Groq", "confidence": 0.7}'
+        assert get_llm_judgment("Test Corp", "Summary", {})['explanation'] == "Groq"
+
+        # A new prompt version misses the existing entries
+        monkeypatch.setattr(llm_utils, 'PROMPT_VERSION', llm_utils.PROMPT_VERSION + 1)
+        get_llm_judgment("Test Corp", "Summary", {})
+        assert mock_groq.call_count == 3
+
+    @patch('src.llm_utils.call_gemini_api', return_value=None)
+    @patch('src.llm_utils.call_groq_api', return_value=None)
+    def test_get_llm_judgment_mock_not_cached(self, mock_groq, mock_gemini):
+        """Mock fallbacks are not cached so later calls retry the real providers."""
+        get_llm_judgment("Test Corp", "Summary", {})
+        get_llm_judgment("Test Corp", "Summary", {})
+        assert mock_groq.call_count == 2
+
+    @patch('src.llm_utils.call_gemini_api', return_value=None)
+    @patch('src.llm_utils.call_groq_api', return_value="Not JSON: the figures look plausible")
+    def test_get_llm_judgment_text_fallback_not_cached(self, mock_groq, mock_gemini):
+        """Malformed replies parsed by the text fallback are not cached."""
+        result = get_llm_judgment("Test Corp", "Summary", {})
+        get_llm_judgment("Test Corp", "Summary", {})
+
+        assert result['explanation'].startswith("AI response analysis:")
+        assert mock_groq.call_count == 2
+
+    @patch('src.llm_utils._SESSION.post')
     def test_call_groq_api_success(self, mock_post):
         mock_response = MagicMock()
         mock_response.status_code = 200
@@ -84,7 +153,7 @@ class TestLLMUtils:
         assert result == '{"verdict": "plausible"}'
         mock_post.assert_called_once()
 
-    @patch('src.llm_utils.requests.post')
+    @patch('src.llm_utils._SESSION.post')
     def test_call_groq_api_failure(self, mock_post):
         mock_response = MagicMock()
         mock_response.status_code = 404
@@ -2,7 +2,8 @@ import pytest
 import pandas as pd
 from pathlib import Path
 from unittest.mock import mock_open, patch
-from src.reporting import generate_quality_report, generate_llm_report, save_to_excel
+from src.reporting import (generate_quality_report, generate_llm_report, generate_combined_report,
+                           save_to_excel, save_snapshot)
 
 class TestReporting:
     
@@ -38,13 +39,34 @@ class TestReporting:
         }
         
         report_path = tmp_path / "llm_report.txt"
-        generate_llm_report(llm_results, report_path, values_standardized=10)
+        generate_llm_report(llm_results, report_path, values_standardized=10, generated_at="2024-01-01T09:30:00")
         
         content = report_path.read_text()
         assert "LLM Anomaly Detection Report" in content
+        assert "Generated: 2024-01-01T09:30:00" in content
         assert "implausible" in content
         assert "10" in content  # standardized values
 
+    def test_generate_combined_report(self, tmp_path):
+        """Test both report sections are written to one file with a shared timestamp."""
+        check_results = {
+            'dtype_issues': {},
+            'missing_summary': pd.Series({'revenue': 5}),
+            'duplicates': pd.DataFrame(columns=['year', 'company_name']),
+            'volatility_flags': pd.DataFrame({'company_name': ['Test Corp']}),
+            'volatile_company_count': 1
+        }
+        llm_results = {'TEST CORP_2023': {'verdict': 'implausible', 'confidence': 0.85}}
+        
+        report_path = tmp_path / "combined_report.txt"
+        generate_combined_report(check_results, llm_results, 10, report_path, generated_at="2024-01-01T09:30:00")
+        
+        content = report_path.read_text()
+        assert content.index("Data Quality Assessment Report") < content.index("LLM Anomaly Detection Report")
+        assert content.count("Generated: 2024-01-01T09:30:00") == 2
+        assert "High Volatility: 1" in content
+        assert "Explanation: N/A" in content
+
     def test_save_to_excel_formatting(self, sample_processed_data, tmp_path):
         """Test Excel saving with professional formatting."""
         # Add some LLM results for testing
@@ -84,4 +106,57 @@ class TestReporting:
         # Verify file was created and handled missing values
         df_reloaded = pd.read_excel(output_path)
         missing_mask = df_reloaded['company_name'].isna() | (df_reloaded['company_name'] == 'N/A')
-        assert missing_mask.any()  # Should have missing values
\ No newline at end of file
+        assert missing_mask.any()  # Should have missing values
+
+    @pytest.mark.parametrize("has_xlsxwriter", [True, False])
+    def test_save_to_excel_missing_value_rendering(self, sample_processed_data, tmp_path, has_xlsxwriter):
+        """Test that only numeric gaps read "N/A"; other missing cells stay blank."""
+        test_df = sample_processed_data.copy()
+        test_df.loc[2, 'company_name'] = None
+        test_df['llm_verdict'] = 'N/A'
+        test_df['llm_explanation'] = 'N/A'
+        test_df['llm_confidence'] = float('nan')
+        
+        output_path = tmp_path / "test_output.xlsx"
+        with patch('src.reporting.HAS_XLSXWRITER', has_xlsxwriter):
+            save_to_excel(test_df, output_path)
+        
+        df_reloaded = pd.read_excel(output_path, keep_default_na=False)
+        missing_row = df_reloaded.iloc[-1]
+        assert missing_row['company_name'] == ''
+        assert missing_row['revenue'] == 'N/A'
+        assert missing_row['yoy_change'] == 'N/A'
+        assert (df_reloaded['llm_confidence'] == 'N/A').all()
+
+    def test_save_to_excel_openpyxl_fallback(self, sample_processed_data, tmp_path):
+        """Test the write-only openpyxl writer used when xlsxwriter is unavailable."""
+        test_df = sample_processed_data.copy()
+        test_df.loc[2, 'company_name'] = None
+        test_df['llm_verdict'] = ['plausible', 'N/A', 'N/A']
+        test_df['llm_explanation'] = ['Test explanation', 'N/A', 'N/A']
+        test_df['llm_confidence'] = [0.8, None, None]
+        
+        output_path = tmp_path / "test_output.xlsx"
+        with patch('src.reporting.HAS_XLSXWRITER', False):
+            save_to_excel(test_df, output_path)
+        
+        df_reloaded = pd.read_excel(output_path, keep_default_na=False)
+        assert df_reloaded.iloc[0]['llm_verdict'] == 'plausible'
+        assert (df_reloaded['llm_confidence'] == 'N/A').sum() == 2
+        
+        from openpyxl import load_workbook
+        ws = load_workbook(output_path).active
+        assert ws.freeze_panes == "A2"
+        assert ws.cell(row=ws.max_row, column=1).fill.fgColor.rgb == "FFFFCCCC"
+
+    def test_save_snapshot(self, sample_processed_data, tmp_path):
+        """Test the Parquet snapshot keeps mixed-type columns readable."""
+        test_df = sample_processed_data.copy()
+        test_df['provider_id'] = [1, 'P2', 3]
+        
+        snapshot_path = tmp_path / "snapshot.parquet"
+        assert save_snapshot(test_df, snapshot_path) == snapshot_path
+        
+        df_reloaded = pd.read_parquet(snapshot_path)
+        assert len(df_reloaded) == len(test_df)
+        assert df_reloaded['provider_id'].tolist() == ['1', 'P2', '3']